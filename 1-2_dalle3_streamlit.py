@@ -7,9 +7,12 @@ import os
 import time
 import streamlit as st
 
+from rerun_profiler import start_rerun
+
 
 # .env 파일 경로 지정 
 load_dotenv(override=True)
+profiler = start_rerun("dalle3")  # .env 에 PROFILE_RERUNS=1 일 때만 동작
 # Open AI API 키 설정하기
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 client = OpenAI(
@@ -41,9 +44,13 @@ def get_image(prompt):
     return image
 
 
+profiler.lap("setup")
+
+
 prompt = "Puss in Boots is a cat wearing a spacesuit and walking through space."
 # 함수 호출
 image = get_image(prompt)
+profiler.lap("module_get_image")  # 리런마다 DALLE 호출이 반복되는 구간
 
 #프롬프트 예시 : 장화신은 고양이가 우주복을 입고 우주를 걷고 있는 모습
 #프롬프트 예시 : Puss in Boots is a cat wearing a spacesuit and walking through space.
@@ -54,10 +61,10 @@ def main():
     st.title("그림 그리는 AI 화가 서비스 👨‍🎨")
     st.image('https://wikidocs.net/images/page/215361/%EC%9D%B8%EA%B3%B5%EC%A7%80%EB%8A%A5%ED%99%94%EA%B0%80.png', width=200)
 
-    input_text = st.text_area("원하는 이미지의 설명을 영어로 적어보세요.", height=200)
+    input_text = st.text_area("원하는 이미지의 설명을 영어로 적어보세요.", height=200, key="input_text")
 
     # Painting이라는 버튼을 클릭하면 True
-    if st.button("Painting"):
+    if st.button("Painting", key="btn_painting"):
 
         # 이미지 프롬프트가 작성된 경우 True
         if input_text:
@@ -70,7 +77,7 @@ def main():
             except:
                 st.error("요청 오류가 발생했습니다")
         # 이미지 저장 버튼 추가
-    if st.button("Save Image"):
+    if st.button("Save Image", key="btn_save"):
         try:
             # 현재 시간 기반 파일명 생성
             timestamp = int(time.time())
@@ -85,4 +92,6 @@ def main():
 
 
 # main 함수 실행
-main()
\ No newline at end of file
+main()
+profiler.lap("main")
+profiler.finish()
@@ -8,9 +8,16 @@ import streamlit as st
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from audio_delivery import mime_for, playback_file, read_audio_bytes
+from prompt_budget import (
+    SUMMARY_MAX_TOKENS, estimate_tokens, pack_prompt, size_max_tokens, summary_token_budget, trim_to_last_sentence,
+)
+from rerun_profiler import start_rerun
+
 # ================== 공통 설정 ==================
 st.set_page_config(page_title="AI Voice Studio", layout="centered")
 load_dotenv(override=True)
+profiler = start_rerun("voice_total")  # .env 에 PROFILE_RERUNS=1 일 때만 동작
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
@@ -61,7 +68,8 @@ def translate_text(text: str, target_language_name: str) -> str:
             {"role": "user", "content": text}
         ],
         temperature=0,
-        max_tokens=1000
+        # 번역 결과 길이는 입력에 비례 (언어에 따라 토큰 수가 늘 수 있어 2배 여유)
+        max_tokens=size_max_tokens(estimate_tokens(text), ratio=2.0)
     )
     return resp.choices[0].message.content.strip()
 
@@ -110,6 +118,8 @@ def recommend_voice_by_llm(text: str) -> str:
         voice = "alloy"
     return voice
 
+profiler.lap("setup")
+
 # ================== UI: 탭 구성 ==================
 st.title("🎙️ AI Voice Studio")
 tabs = st.tabs(["🗣️ 텍스트 → 오디오", "📊 보고서 업로드 → 요약 → 오디오", "📜 생성 히스토리"])
@@ -122,7 +132,7 @@ with tabs[0]:
     colA, colB = st.columns([3, 2])
     with colA:
         default_text = "포기하지 않는 간절한 꿈은 꼭 이루어집니다."
-        user_prompt = st.text_area("스크립트 입력", value=default_text, height=160)
+        user_prompt = st.text_area("스크립트 입력", value=default_text, height=160, key="tts_text")
 
     with colB:
         st.markdown("**보이스 선택 모드**")
@@ -130,12 +140,13 @@ with tabs[0]:
             label="",
             options=["수동 선택", "룰 기반 추천", "LLM 기반 추천"],
             horizontal=False,
-            index=1
+            index=1,
+            key="voice_mode"
         )
-        manual_voice = st.selectbox("수동 선택 시 보이스", VOICE_OPTIONS, index=VOICE_OPTIONS.index("alloy"))
+        manual_voice = st.selectbox("수동 선택 시 보이스", VOICE_OPTIONS, index=VOICE_OPTIONS.index("alloy"), key="manual_voice")
 
         st.markdown("**번역 옵션**")
-        do_translate = st.checkbox("선택 언어로 번역 후 TTS", value=False)
+        do_translate = st.checkbox("선택 언어로 번역 후 TTS", value=False, key="do_translate")
         languages = {
             "한국어": "Korean",
             "영어": "English",
@@ -144,10 +155,10 @@ with tabs[0]:
             "스페인어": "Spanish",
             "프랑스어": "French",
         }
-        target_lang_name = st.selectbox("번역 대상 언어", list(languages.keys()), index=0)
-        out_fmt = st.radio("오디오 포맷", ["mp3", "wav"], index=0, horizontal=True)
+        target_lang_name = st.selectbox("번역 대상 언어", list(languages.keys()), index=0, key="target_lang")
+        out_fmt = st.radio("오디오 포맷", ["mp3", "wav"], index=0, horizontal=True, key="fmt1")
 
-    if st.button("🔊 오디오 생성"):
+    if st.button("🔊 오디오 생성", key="btn_tts"):
         if not user_prompt.strip():
             st.warning("스크립트를 입력해 주세요.")
         else:
@@ -174,9 +185,10 @@ with tabs[0]:
                 # 4) 저장/재생/다운로드
                 path = save_audio_bytes(audio_bytes, voice=voice, fmt=out_fmt, prefix="tts")
                 st.success(f"✅ 생성 완료: {os.path.basename(path)} (voice={voice})")
-                st.audio(path, format=f"audio/{out_fmt}")
-                with open(path, "rb") as f:
-                    st.download_button("⬇️ 다운로드", data=f.read(), file_name=os.path.basename(path), mime=f"audio/{out_fmt}")
+                # 재생은 저용량 변환본, 다운로드는 선택한 포맷 원본
+                play_path, play_mime = playback_file(path)
+                st.audio(play_path, format=play_mime)
+                st.download_button("⬇️ 다운로드", data=read_audio_bytes(path), file_name=os.path.basename(path), mime=mime_for(path))
 
                 # 히스토리 기록
                 st.session_state["clips"].append({
@@ -189,14 +201,16 @@ with tabs[0]:
                 st.error("오디오 생성 중 오류가 발생했습니다.")
                 st.exception(e)
 
+profiler.lap("tab_text")
+
 # ============== 탭 2: 보고서 업로드 → 요약 → 오디오 ==============
 with tabs[1]:
     st.subheader("📊 컨설턴트용 리포트 자동 요약 & 오디오 브리핑")
     st.caption("PDF / DOCX / TXT를 업로드하면 한국어로 핵심 요약 후 오디오로 만들어드립니다.")
 
-    uploaded_file = st.file_uploader("보고서를 업로드하세요", type=["pdf", "docx", "txt"])
+    uploaded_file = st.file_uploader("보고서를 업로드하세요", type=["pdf", "docx", "txt"], key="report_file")
     # 보이스 선택(수동) + 안내
-    sel_voice = st.selectbox("보이스 선택", VOICE_OPTIONS, index=VOICE_OPTIONS.index("nova"))
+    sel_voice = st.selectbox("보이스 선택", VOICE_OPTIONS, index=VOICE_OPTIONS.index("nova"), key="sel_voice")
     out_fmt2 = st.radio("오디오 포맷", ["mp3", "wav"], index=0, horizontal=True, key="fmt2")
 
     text = ""
@@ -206,10 +220,10 @@ with tabs[1]:
                 ext = uploaded_file.name.split(".")[-1].lower()
                 if ext == "pdf":
                     reader = PyPDF2.PdfReader(uploaded_file)
-                    text = " ".join([page.extract_text() for page in reader.pages if page.extract_text()])
+                    text = "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
                 elif ext == "docx":
                     doc = Document(uploaded_file)
-                    text = " ".join([p.text for p in doc.paragraphs])
+                    text = "\n".join([p.text for p in doc.paragraphs])
                 elif ext == "txt":
                     text = uploaded_file.read().decode("utf-8")
             except Exception as e:
@@ -220,14 +234,15 @@ with tabs[1]:
         if len(text) < 100:
             st.warning("본문 내용이 너무 짧습니다. 파일을 확인해 주세요.")
         else:
-            st.success(f"본문 길이: {len(text)}자")
-            if st.checkbox("본문 미리보기"):
+            st.success(f"본문 길이: {len(text)}자 (약 {estimate_tokens(text)} 토큰)")
+            if st.checkbox("본문 미리보기", key="preview"):
                 st.text_area("본문 일부", value=text[:2000], height=200)
 
-            if st.button("🧭 한국어 요약 생성"):
+            if st.button("🧭 한국어 요약 생성", key="btn_summary"):
                 with st.spinner("AI가 컨설팅 요약을 작성 중입니다…"):
                     try:
-                        # 한국어 컨설팅 요약
+                        # 한국어 컨설팅 요약 (토큰 예산 안에서 제목/요약/결론 위주로 본문 압축)
+                        packed_text = pack_prompt(text, summary_token_budget())
                         summary_prompt = f"""
                         아래는 컨설팅 보고서 본문 일부입니다.
                         핵심 경영 인사이트, 시사점, 권고사항 중심으로
@@ -236,7 +251,7 @@ with tabs[1]:
                         경영진이 이해하기 쉽게 간결한 문체로 정리해주세요.
 
                         본문:
-                        {text[:12000]}
+                        {packed_text}
                         """
                         summary_resp = client.chat.completions.create(
                             model="gpt-4o-mini",
@@ -245,8 +260,13 @@ with tabs[1]:
                                 {"role": "user", "content": summary_prompt}
                             ],
                             temperature=0.4,
+                            max_tokens=SUMMARY_MAX_TOKENS,
                         )
                         summary_text = summary_resp.choices[0].message.content.strip()
+                        if summary_resp.choices[0].finish_reason == "length":
+                            # 길이 제한으로 잘린 문장이 그대로 음성으로 나가지 않도록 마지막 완결 문장까지만 사용
+                            st.warning("요약이 길이 제한에 걸려 마지막 완결 문장까지만 사용합니다.")
+                            summary_text = trim_to_last_sentence(summary_text)
 
                         st.markdown("**🧭 핵심 요약 결과**")
                         st.write(summary_text)
@@ -257,10 +277,10 @@ with tabs[1]:
 
                         path = save_audio_bytes(audio_bytes, voice=sel_voice, fmt=out_fmt2, prefix="summary_brief")
                         st.success(f"✅ 생성 완료: {os.path.basename(path)} (voice={sel_voice})")
-                        st.audio(path, format=f"audio/{out_fmt2}")
-                        with open(path, "rb") as f:
-                            st.download_button("⬇️ 오디오 브리핑 다운로드", data=f.read(),
-                                               file_name=os.path.basename(path), mime=f"audio/{out_fmt2}")
+                        play_path, play_mime = playback_file(path)
+                        st.audio(play_path, format=play_mime)
+                        st.download_button("⬇️ 오디오 브리핑 다운로드", data=read_audio_bytes(path),
+                                           file_name=os.path.basename(path), mime=mime_for(path))
 
                         # 히스토리 저장
                         st.session_state["clips"].append({
@@ -273,6 +293,8 @@ with tabs[1]:
                         st.error("요약/오디오 생성 중 오류가 발생했습니다.")
                         st.exception(e)
 
+profiler.lap("tab_report")
+
 # ============== 탭 3: 생성 히스토리 ==============
 with tabs[2]:
     st.subheader("📜 생성 히스토리")
@@ -288,11 +310,13 @@ with tabs[2]:
                     f"**출처:** { '텍스트' if clip.get('source')=='text' else '보고서'}"
                 )
                 st.caption(clip["text"])
-                st.audio(clip["path"], format=f"audio/{clip['fmt']}")
+                play_path, play_mime = playback_file(clip["path"])
+                st.audio(play_path, format=play_mime)
             with col2:
-                with open(clip["path"], "rb") as f:
-                    st.download_button("다운로드", data=f.read(),
-                                       file_name=os.path.basename(clip["path"]),
-                                       mime=f"audio/{clip['fmt']}",
-                                       key=f"dl_{clip['ts']}")
-    
\ No newline at end of file
+                st.download_button("다운로드", data=read_audio_bytes(clip["path"]),
+                                   file_name=os.path.basename(clip["path"]),
+                                   mime=mime_for(clip["path"]),
+                                   key=f"dl_{clip['ts']}")
+
+profiler.lap("history")
+profiler.finish()
@@ -6,6 +6,10 @@ from openai import OpenAI
 from dotenv import load_dotenv
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prompt_budget import SUMMARY_MAX_TOKENS, estimate_tokens, pack_prompt, summary_token_budget, trim_to_last_sentence
+from subtitles import audio_duration, build_srt, concat_audio, split_segments
 
 
 # .env 파일 경로 지정 
@@ -41,10 +45,10 @@ if uploaded_file is not None:
         try:
             if file_type == "pdf":
                 reader = PyPDF2.PdfReader(uploaded_file)
-                text = " ".join([page.extract_text() for page in reader.pages if page.extract_text()])
+                text = "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
             elif file_type == "docx":
                 doc = Document(uploaded_file)
-                text = " ".join([para.text for para in doc.paragraphs])
+                text = "\n".join([para.text for para in doc.paragraphs])
             elif file_type == "txt":
                 text = uploaded_file.read().decode("utf-8")
         except Exception as e:
@@ -56,7 +60,7 @@ if uploaded_file is not None:
     if len(text) < 100:
         st.warning("본문 내용이 너무 짧습니다. 다시 확인해주세요.")
     else:
-        st.success(f"본문 길이: {len(text)}자")
+        st.success(f"본문 길이: {len(text)}자 (약 {estimate_tokens(text)} 토큰)")
         if st.checkbox("본문 미리보기"):
             st.text_area("본문 일부", value=text[:2000], height=200)
 
@@ -64,13 +68,15 @@ if uploaded_file is not None:
         if st.button("요약 생성하기"):
             with st.spinner("AI가 컨설팅 요약을 작성 중입니다..."):
                 try:
+                    # 토큰 예산 안에서 제목/요약/결론 위주로 본문 압축
+                    packed_text = pack_prompt(text, summary_token_budget())
                     summary_prompt = f"""
                     아래는 컨설팅 보고서 본문 일부입니다.
                     핵심 경영 인사이트, 시사점, 권고사항 중심으로
                     20줄 이내의 한국어 핵심 요약문을 작성해주세요.
                     불필요한 전문용어나 영어 표현은 지양하고, 
                     경영진이 이해하기 쉽게 간결한 문체로 정리해주세요.
-                    \n\n본문:\n{text[:20000]}
+                    \n\n본문:\n{packed_text}
                     """
                     summary_resp = client.chat.completions.create(
                         model="gpt-4o-mini",
@@ -79,29 +85,53 @@ if uploaded_file is not None:
                             {"role": "user", "content": summary_prompt}
                         ],
                         temperature=0.4,
+                        max_tokens=SUMMARY_MAX_TOKENS,
                     )
                     summary_text = summary_resp.choices[0].message.content.strip()
+                    if summary_resp.choices[0].finish_reason == "length":
+                        # 길이 제한으로 잘린 문장이 그대로 음성으로 나가지 않도록 마지막 완결 문장까지만 사용
+                        st.warning("요약이 길이 제한에 걸려 마지막 완결 문장까지만 사용합니다.")
+                        summary_text = trim_to_last_sentence(summary_text)
 
                     st.subheader("🧭 핵심 요약 결과")
                     st.write(summary_text)
 
-                    # ===== TTS 변환 =====
+                    # ===== TTS 변환 (문장 단위 합성 → 자막 타이밍 동시 확보) =====
                     st.info("요약 내용을 음성으로 변환합니다...")
-                    tts_bytes = client.audio.speech.create(
-                        model="tts-1",
-                        voice="nova",
-                        input=summary_text,
-                        response_format="mp3"
-                    ).content
+                    segments = split_segments(summary_text)
+                    if not segments:
+                        # 빈 요약으로 0바이트 mp3/빈 자막을 만들지 않도록 여기서 중단
+                        st.warning("요약 결과가 비어 있어 음성을 만들 수 없습니다. 다시 시도해주세요.")
+                        st.stop()
+
+                    def synthesize(segment):
+                        return client.audio.speech.create(
+                            model="tts-1",
+                            voice="nova",
+                            input=segment,
+                            response_format="mp3"
+                        ).content
+
+                    with ThreadPoolExecutor(max_workers=4) as pool:
+                        parts = list(pool.map(synthesize, segments))
+                    tts_bytes = concat_audio(parts, "mp3")
+                    # 각 조각의 길이는 mp3 프레임 헤더로 계산 (별도 전사 불필요)
+                    srt_text = build_srt(segments, [audio_duration(p, "mp3") for p in parts])
 
                     os.makedirs("output_audio", exist_ok=True)
-                    audio_path = f"output_audio/summary_brief_{int(time.time())}.mp3"
+                    ts = int(time.time())
+                    audio_path = f"output_audio/summary_brief_{ts}.mp3"
+                    srt_path = f"output_audio/summary_brief_{ts}.srt"
                     with open(audio_path, "wb") as f:
                         f.write(tts_bytes)
+                    with open(srt_path, "w", encoding="utf-8") as f:
+                        f.write(srt_text)
 
                     st.audio(audio_path, format="audio/mp3")
                     with open(audio_path, "rb") as f:
                         st.download_button("⬇️ 오디오 브리핑 다운로드", data=f, file_name="summary_brief.mp3")
+                    st.download_button("⬇️ 자막(SRT) 다운로드", data=srt_text.encode("utf-8"),
+                                       file_name="summary_brief.srt", mime="application/x-subrip")
 
                     # 세션 히스토리 기록 (기존 clips에도 추가 가능)
                     st.session_state["clips"].append({
@@ -110,7 +140,7 @@ if uploaded_file is not None:
                         "fmt": "mp3",
                         "ts": int(time.time()),
                         "text": summary_text[:120] + ("..." if len(summary_text) > 120 else ""),
-                        "srt_path": None
+                        "srt_path": srt_path
                     })
 
                 except Exception as e:
@@ -0,0 +1,120 @@
+"""
+오디오 전달(delivery) 레이어
+
+클립마다 사용자가 고른 포맷(mp3/wav)의 원본(master) 파일 하나만 저장하고,
+- 페이지 내 재생(st.audio)에는 저용량 포맷(기본: 48kbps mp3)을 사용
+- 다운로드에는 원본 포맷을 그대로 제공
+한다. 재생용 파일은 처음 필요할 때 ffmpeg 로 변환해 output_audio/playback/ 에 캐시하며,
+ffmpeg 가 없으면 원본을 그대로 재생한다.
+
+    play_path, play_mime = playback_file(path)
+    st.audio(play_path, format=play_mime)
+    st.download_button(..., data=read_audio_bytes(path), mime=mime_for(path))
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+import streamlit as st
+
+PLAYBACK_SUBDIR = "playback"
+
+# 이미 충분히 작은 포맷은 변환하지 않고 원본을 재생
+COMPACT_FORMATS = {"mp3", "opus", "aac"}
+
+MIME_TYPES = {
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg",
+    "aac": "audio/aac",
+    "flac": "audio/flac",
+    "wav": "audio/wav",
+    "pcm": "audio/L16",
+}
+
+# 변환에 실패한 (원본 경로, 수정시각, 포맷, 비트레이트). 리런마다 ffmpeg 를 다시 돌리지 않도록 기억한다
+_failed = set()
+_failed_lock = threading.Lock()
+
+_CODEC_ARGS = {
+    "mp3": ["-c:a", "libmp3lame"],
+    "opus": ["-c:a", "libopus"],
+}
+
+
+def _ext(path: str) -> str:
+    return os.path.splitext(path)[1].lstrip(".").lower()
+
+
+def mime_for(path: str) -> str:
+    fmt = _ext(path)
+    return MIME_TYPES.get(fmt, f"audio/{fmt}")
+
+
+def _playback_settings():
+    """
+    (재생 포맷, 비트레이트). 앱이 import 후에 load_dotenv() 를 호출하고 모듈은 리런 간에 유지되므로
+    import 시점이 아니라 사용할 때마다 환경변수를 읽는다.
+    """
+    fmt = os.getenv("PLAYBACK_FORMAT", "mp3").strip().lower()   # mp3 또는 opus
+    bitrate = os.getenv("PLAYBACK_BITRATE", "48k").strip()
+    return fmt, bitrate
+
+
+def _transcode(src: str, dst: str, fmt: str, bitrate: str) -> bool:
+    """ffmpeg 로 저비트레이트 모노 파일 생성. 실패하면 False"""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return False
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    # 세션들은 같은 프로세스의 스레드라 pid 로는 구분되지 않으므로, 변환마다 고유한 임시 파일에 쓴 뒤 교체
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dst), prefix=".tmp_", suffix=f".{fmt}")
+    os.close(fd)
+    cmd = [ffmpeg, "-y", "-loglevel", "error", "-i", src, "-ac", "1",
+           *_CODEC_ARGS.get(fmt, []), "-b:a", bitrate, tmp]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, timeout=120)
+        os.replace(tmp, dst)
+        return True
+    except (OSError, subprocess.SubprocessError):
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+
+
+def playback_file(path: str):
+    """
+    페이지 내 재생용 (경로, mime) 반환.
+    원본이 이미 저용량 포맷이면 원본을, 아니면 캐시된(없으면 새로 만든) 변환본을 돌려준다.
+    """
+    if _ext(path) in COMPACT_FORMATS:
+        return path, mime_for(path)
+
+    fmt, bitrate = _playback_settings()
+    stem = os.path.splitext(os.path.basename(path))[0]
+    # 설정을 바꾸면 예전 변환본을 쓰지 않도록 비트레이트까지 파일명에 포함
+    cached = os.path.join(os.path.dirname(path), PLAYBACK_SUBDIR, f"{stem}.{bitrate}.{fmt}")
+    mtime = os.path.getmtime(path)
+    if os.path.exists(cached) and os.path.getmtime(cached) >= mtime:
+        return cached, mime_for(cached)
+    failure_key = (path, mtime, fmt, bitrate)
+    if failure_key in _failed:
+        return path, mime_for(path)
+    if _transcode(path, cached, fmt, bitrate):
+        return cached, mime_for(cached)
+    with _failed_lock:
+        _failed.add(failure_key)
+    return path, mime_for(path)
+
+
+# cache_data 는 호출마다 복사본을 만들므로, 읽기 전용 bytes 는 cache_resource 로 같은 객체를 공유
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _read_cached(path: str, mtime: float) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def read_audio_bytes(path: str) -> bytes:
+    """다운로드용 원본 바이트. 리런마다 디스크에서 다시 읽지 않도록 (경로, 수정시각) 기준 캐시"""
+    return _read_cached(path, os.path.getmtime(path))
@@ -0,0 +1,249 @@
+"""
+토큰 예산 기반 프롬프트 패킹
+
+글자 수로 자르면(text[:12000]) 한국어/영어에 따라 토큰 수가 크게 달라진다.
+여기서는 오프라인으로 토큰 수를 추정하고, 정해진 토큰 예산 안에
+중요한 부분(제목, 요약/결론/시사점/권고 섹션, 도입부)을 우선 채워 넣는다.
+
+- estimate_tokens(text): 토큰 수 추정 (tiktoken 이 설치되어 있으면 정확히 계산)
+- pack_prompt(text, budget_tokens): 예산 안에 들어가도록 본문 압축
+- size_max_tokens(input_tokens, ...): 입력 길이에 비례해 max_tokens 결정
+- summary_token_budget() / SUMMARY_MAX_TOKENS: 보고서 요약 호출용 설정
+- trim_to_last_sentence(text): 길이 제한으로 잘린 응답을 마지막 완결 문장까지만 남김
+"""
+import math
+import os
+import re
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")  # gpt-4o 계열 토크나이저
+except Exception:  # 미설치 또는 인코딩 파일을 받을 수 없는(오프라인) 환경
+    _ENCODING = None
+
+# 대략적인 토큰 비용 (o200k_base 기준 경험치)
+_TOKEN_RE = re.compile(
+    r"(?P<hangul>[가-힣])"
+    r"|(?P<cjk>[぀-ヿ一-鿿])"
+    r"|(?P<word>[A-Za-z]+)"
+    r"|(?P<digits>\d+)"
+    r"|(?P<space>\s+)"
+    r"|(?P<other>.)",
+    re.S,
+)
+
+PRIORITY_KEYWORDS = [
+    "요약", "핵심", "결론", "시사점", "권고", "제언", "개요", "결과",
+    "executive summary", "summary", "conclusion", "recommendation", "key findings", "overview",
+]
+
+_HEADING_PREFIX_RE = re.compile(
+    r"^(#+\s*|\d+(\.\d+)*[.)]\s+|\d+(\.\d+)+\s+|[IVX]+\.\s*|[ⅠⅡⅢⅣⅤⅥⅦⅧⅨⅩ]+\.?\s*|[가-하]\.\s*|제\s*\d+\s*[장절]\s*)"
+)
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?。])\s+")
+GAP_MARKER = "…"
+# 문장 끝: 마침표류 뒤에 공백/문자열 끝이 와야 함 ("3.5" 의 점은 제외), 또는 줄바꿈
+_SENTENCE_END_RE = re.compile(r"[.!?。](?=\s|$)|\n")
+
+# 요약 길이는 입력이 아니라 "20줄 이내" 지시로 정해지므로 고정 상한 (한국어 20줄 ≈ 800~1000 토큰)
+SUMMARY_MAX_TOKENS = 1200
+
+
+def summary_token_budget() -> int:
+    """요약 프롬프트에 넣을 본문 토큰 예산. load_dotenv() 이후 값을 읽도록 호출 시점에 조회"""
+    try:
+        return int(os.getenv("SUMMARY_TOKEN_BUDGET", "4000"))
+    except ValueError:
+        return 4000
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토큰 수 추정. tiktoken 이 없으면 문자 종류별 가중치로 계산한다.
+    (한글 음절 ≈ 0.8토큰, 영단어 ≈ 4글자당 1토큰, 숫자 ≈ 3자리당 1토큰, 기호 1토큰)
+    """
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+
+    total = 0.0
+    for m in _TOKEN_RE.finditer(text):
+        kind = m.lastgroup
+        if kind == "hangul":
+            total += 0.8
+        elif kind == "cjk":
+            total += 1.0
+        elif kind == "word":
+            total += math.ceil(len(m.group()) / 4)
+        elif kind == "digits":
+            total += math.ceil(len(m.group()) / 3)
+        elif kind == "other":
+            total += 1.0
+        # 공백은 대부분 다음 토큰에 합쳐지므로 0
+    return math.ceil(total)
+
+
+def size_max_tokens(input_tokens: int, ratio: float, floor: int = 64, ceiling: int = 4096) -> int:
+    """입력 토큰 수 × ratio 를 [floor, ceiling] 범위로 잘라 max_tokens 로 사용"""
+    return max(floor, min(ceiling, math.ceil(input_tokens * ratio)))
+
+
+_HEADING_CONNECTORS = {"및", "과", "와", "and", "&", "/", "·"}
+
+
+def _is_keyword_title(s: str) -> bool:
+    """'결론 및 시사점', 'Executive Summary' 처럼 키워드(와 연결어)만으로 된 짧은 줄인지"""
+    s = s.lower().strip(" :：-")
+    if not s or len(s) > 20:
+        return False
+    for k in sorted(PRIORITY_KEYWORDS, key=len, reverse=True):
+        s = s.replace(k, " ")
+    return all(w in _HEADING_CONNECTORS for w in s.split())
+
+
+def trim_to_last_sentence(text: str) -> str:
+    """마지막 완결 문장까지만 남긴다. 문장 끝을 찾지 못하면 원문 그대로"""
+    ends = list(_SENTENCE_END_RE.finditer(text))
+    if not ends:
+        return text
+    return text[:ends[-1].end()].strip()
+
+
+def _is_heading(line: str) -> bool:
+    """
+    번호/기호로 시작하는 짧은 줄, 키워드만으로 된 짧은 줄, 대문자 줄을 제목으로 본다.
+    (PDF 의 짧은 시각적 줄바꿈 조각이 키워드를 포함했다는 이유만으로 제목이 되지 않도록)
+    """
+    s = line.strip()
+    if not s or len(s) > 40:
+        return False
+    if s.endswith((".", "다", "요", ",")):
+        return False
+    if _HEADING_PREFIX_RE.match(s) or _is_keyword_title(s):
+        return True
+    return s.isupper() and len(s) > 3
+
+
+def _split_windows(text: str, max_tokens: int) -> list:
+    """
+    문장 부호 없이 긴 텍스트를 max_tokens 이내 조각으로 자른다.
+    공백(단어) 단위로 채우고, 한 단어가 그래도 크면 글자 단위로 자른다.
+    """
+    windows = []
+    cur, cur_tokens = [], 0
+    for word in text.split():
+        tokens = estimate_tokens(word)
+        if tokens > max_tokens:
+            # 글자 수 비율로 한 번에 자른 뒤, 추정치가 넘치면 조금씩 줄인다
+            step = max(1, len(word) * max_tokens // tokens)
+            pos = 0
+            while pos < len(word):
+                end = min(len(word), pos + step)
+                while end - pos > 1 and estimate_tokens(word[pos:end]) > max_tokens:
+                    end -= max(1, (end - pos) // 10)
+                windows.append(word[pos:end])
+                pos = end
+            continue
+        if cur and cur_tokens + tokens > max_tokens:
+            windows.append(" ".join(cur))
+            cur, cur_tokens = [], 0
+        cur.append(word)
+        cur_tokens += tokens
+    if cur:
+        windows.append(" ".join(cur))
+    return windows
+
+
+def _split_blocks(text: str, max_block_tokens: int) -> list:
+    """
+    줄 단위로 나누고, 너무 긴 줄(블록)은 문장 단위로,
+    그래도 긴 문장은 max_block_tokens 크기 조각으로 다시 나눈다
+    """
+    blocks = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if estimate_tokens(line) <= max_block_tokens:
+            blocks.append(line)
+            continue
+        for sentence in _SENTENCE_SPLIT_RE.split(line):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            if estimate_tokens(sentence) <= max_block_tokens:
+                blocks.append(sentence)
+            else:
+                blocks.extend(_split_windows(sentence, max_block_tokens))
+    return blocks
+
+
+def _score_blocks(blocks: list) -> list:
+    n = len(blocks)
+    head_n = max(1, n // 10)
+    scores = []
+    in_priority_section = False
+    for i, block in enumerate(blocks):
+        lower = block.lower()
+        has_keyword = any(k in lower for k in PRIORITY_KEYWORDS)
+        score = 1.0
+        if _is_heading(block):
+            # 새 제목을 만나면 섹션이 바뀐 것으로 본다
+            in_priority_section = has_keyword
+            score += 2.0
+        elif in_priority_section:
+            score += 2.0
+        if has_keyword:
+            score += 1.0
+        if i < head_n:
+            score += 1.0  # 도입부
+        elif i >= n - head_n:
+            score += 0.5  # 맺음말
+        scores.append(score)
+    return scores
+
+
+def pack_prompt(text: str, budget_tokens: int) -> str:
+    """
+    본문을 budget_tokens 이내로 압축.
+    점수가 높은 블록부터 예산이 찰 때까지 고른 뒤 원래 순서대로 이어 붙이고,
+    빠진 구간은 '…' 로 표시한다. 남는 예산은 다음으로 중요한 블록의 앞부분으로 채운다.
+    """
+    text = (text or "").strip()
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+
+    blocks = _split_blocks(text, max_block_tokens=max(1, budget_tokens // 4))
+    costs = [estimate_tokens(b) + 1 for b in blocks]  # +1: 줄바꿈/생략 표시
+    scores = _score_blocks(blocks)
+
+    chosen = set()
+    used = 0
+    order = sorted(range(len(blocks)), key=lambda i: (-scores[i], i))
+    for i in order:
+        if used + costs[i] <= budget_tokens - 1:  # -1: 끝의 생략 표시
+            chosen.add(i)
+            used += costs[i]
+
+    # 남은 예산은 들어가지 못한 블록 중 가장 중요한 것의 앞부분으로 채운다
+    remaining = budget_tokens - 1 - used - 2  # -2: 줄바꿈 + 잘림 표시
+    if remaining > 0:
+        for i in order:
+            if i not in chosen:
+                head = _split_windows(blocks[i], remaining)
+                if head:
+                    blocks[i] = f"{head[0]} {GAP_MARKER}"
+                    chosen.add(i)
+                break
+
+    lines = []
+    prev = -1
+    for i in sorted(chosen):
+        if i != prev + 1:
+            lines.append(GAP_MARKER)
+        lines.append(blocks[i])
+        prev = i
+    if prev != len(blocks) - 1:
+        lines.append(GAP_MARKER)
+    return "\n".join(lines)
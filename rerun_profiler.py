@@ -0,0 +1,210 @@
+"""
+Streamlit 리런(rerun) 프로파일러 (opt-in)
+
+Streamlit은 위젯을 건드릴 때마다 스크립트 전체를 다시 실행하므로
+모듈 레벨 작업(클라이언트 생성, 파일 읽기, 히스토리 렌더링 등)의 비용이 매번 반복된다.
+.env 에 PROFILE_RERUNS=1 을 넣으면 다음을 수행한다.
+  - 리런마다 전체 소요 시간과 구간(section)별 시간 측정
+  - 어떤 위젯(key)이 리런을 유발했는지 기록
+  - 가장 느린 리런 N개의 cProfile 통계를 profile_output/ 에 .prof 로 저장
+
+사용 예:
+    profiler = start_rerun("voice_total")
+    ... 공통 설정 ...
+    profiler.lap("setup")
+    ... 탭 1 ...
+    profiler.lap("tab_text")
+    profiler.finish()
+
+위젯에 key 를 지정해야 트리거 위젯 이름이 표시된다. (key 없는 위젯은 session_state에 나타나지 않음)
+버튼 key 는 "btn_"(다운로드 버튼은 "dl_")로 시작하게 지어야 같은 버튼을 연달아 눌러도 트리거로 잡힌다.
+"""
+import cProfile
+import logging
+import os
+import re
+import threading
+import time
+
+import streamlit as st
+
+PROFILE_DIR = "profile_output"
+STATE_KEY = "_rerun_profiler"
+HISTORY_SIZE = 50
+# 클릭한 리런에서만 True 가 되는 버튼류 위젯의 key 접두어
+BUTTON_KEY_PREFIXES = ("btn_", "dl_")
+
+logger = logging.getLogger(__name__)
+
+# 프로세스 전체(모든 세션)에서 가장 느린 리런 목록: [(소요시간, .prof 경로)]
+_slowest = []
+_slowest_lock = threading.Lock()
+
+
+def _is_enabled() -> bool:
+    return os.getenv("PROFILE_RERUNS", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _top_n() -> int:
+    try:
+        return max(1, int(os.getenv("PROFILE_TOP_N", "5")))
+    except ValueError:
+        return 5
+
+
+def _snapshot_widgets(buttons_released: bool = False) -> dict:
+    """
+    session_state 중 위젯 값으로 볼 수 있는 것만 비교 가능한 형태로 저장
+    (업로드 파일은 file_id 로 비교, 리스트/딕셔너리 같은 앱 데이터는 제외)
+    buttons_released=True 면 버튼 값을 False 로 저장한다. 다음 리런 비교 기준으로 쓰는 스냅샷에서
+    클릭 직후의 True 를 남겨 두면, 같은 버튼을 다시 눌렀을 때 True → True 로 변화가 보이지 않는다.
+    """
+    snap = {}
+    for k, v in st.session_state.items():
+        k = str(k)
+        if k.startswith("_"):
+            continue
+        if buttons_released and k.startswith(BUTTON_KEY_PREFIXES):
+            snap[k] = False
+        elif isinstance(v, (str, int, float, bool, type(None))):
+            snap[k] = v
+        elif hasattr(v, "file_id"):
+            snap[k] = f"file:{v.file_id}"
+    return snap
+
+
+def _detect_trigger(prev, curr) -> str:
+    if prev is None:
+        return "(첫 실행)"
+    changed = [k for k in curr if k not in prev or prev[k] != curr[k]]
+    changed += [k for k in prev if k not in curr]
+    # 값이 켜진(참) 쪽을 우선한다 (체크박스 해제 등과 함께 바뀐 경우 클릭/입력한 위젯을 앞세움)
+    active = [k for k in changed if curr.get(k)]
+    picked = active or changed
+    return ", ".join(sorted(picked)) if picked else "(알 수 없음)"
+
+
+class _NullProfiler:
+    """프로파일링이 꺼져 있을 때 쓰는 아무것도 하지 않는 객체"""
+
+    def lap(self, name: str) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+
+class RerunProfiler:
+    def __init__(self, app_name: str):
+        self.app_name = app_name
+
+        state = st.session_state.setdefault(STATE_KEY, {"prev_widgets": None, "history": []})
+        # 이전 리런이 finish() 전에 끊겼으면(위젯 클릭으로 인한 RerunException, 스크립트 예외 등)
+        # 켜진 채 남은 cProfile 을 끄고 중단된 리런으로 기록한다.
+        # (3.12 부터 cProfile 은 프로세스 전체에 하나만 켤 수 있어 그대로 두면 이후 프로파일이 모두 실패)
+        stale = state.pop("active", None)
+        if stale is not None:
+            stale._close(interrupted=True)
+
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.sections = []  # [(이름, 초)]
+        self.trigger = _detect_trigger(state["prev_widgets"], _snapshot_widgets())
+
+        # cProfile은 동시에 하나만 켤 수 있어서(다른 세션이 사용 중이면) 실패 시 타이밍만 기록
+        self.cprof = cProfile.Profile()
+        try:
+            self.cprof.enable()
+        except ValueError:
+            self.cprof = None
+        state["active"] = self
+
+    def lap(self, name: str) -> None:
+        """직전 lap(또는 시작) 이후 경과 시간을 name 구간으로 기록"""
+        now = time.perf_counter()
+        self.sections.append((name, now - self.last))
+        self.last = now
+
+    def finish(self) -> None:
+        state = st.session_state[STATE_KEY]
+        state.pop("active", None)
+        record = self._close(interrupted=False)
+        # finish 시점의 위젯 값을 기준으로 다음 리런의 트리거를 판단
+        state["prev_widgets"] = _snapshot_widgets(buttons_released=True)
+        _render(record, state["history"])
+
+    def _close(self, interrupted: bool) -> dict:
+        """cProfile 을 끄고 리런 기록을 히스토리에 추가"""
+        if self.cprof is not None:
+            self.cprof.disable()
+        if time.perf_counter() - self.last > 0.0005:
+            # 중단된 리런은 다음 리런 시작 시점까지를 마지막 구간으로 본다
+            self.lap("중단" if interrupted else "기타")
+        total = self.last - self.start
+
+        state = st.session_state[STATE_KEY]
+        record = {
+            "ts": time.strftime("%H:%M:%S"),
+            "trigger": self.trigger + (" (중단됨)" if interrupted else ""),
+            "total_ms": round(total * 1000, 1),
+            "sections": {name: round(sec * 1000, 1) for name, sec in self.sections},
+            "prof_path": self._maybe_dump(total),
+        }
+        state["history"] = (state["history"] + [record])[-HISTORY_SIZE:]
+
+        logger.info("[%s] rerun %.1fms trigger=%s sections=%s",
+                    self.app_name, record["total_ms"], record["trigger"], record["sections"])
+        return record
+
+    def _maybe_dump(self, total: float):
+        """지금까지 가장 느린 N개 안에 들면 .prof 저장, 밀려난 파일은 삭제"""
+        if self.cprof is None:
+            return None
+        n = _top_n()
+        with _slowest_lock:
+            if len(_slowest) >= n and total <= _slowest[-1][0]:
+                return None
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            trigger = re.sub(r"[^0-9a-zA-Z._-]+", "_", self.trigger)[:40]
+            path = os.path.join(
+                PROFILE_DIR, f"rerun_{self.app_name}_{int(total * 1000)}ms_{trigger}_{time.time_ns()}.prof"
+            )
+            self.cprof.dump_stats(path)
+            _slowest.append((total, path))
+            _slowest.sort(key=lambda x: x[0], reverse=True)
+            for _, old_path in _slowest[n:]:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+            del _slowest[n:]
+        return path
+
+
+def _render(record: dict, history: list) -> None:
+    with st.sidebar.expander("⏱️ Rerun profiler", expanded=False):
+        st.markdown(f"**마지막 리런:** {record['total_ms']}ms · 트리거: `{record['trigger']}`")
+        st.table([{"구간": k, "ms": v} for k, v in record["sections"].items()])
+        if record["prof_path"]:
+            st.caption(f"cProfile 저장: {record['prof_path']}")
+
+        # 트리거별 평균/최대 (이 세션 기준)
+        by_trigger = {}
+        for r in history:
+            by_trigger.setdefault(r["trigger"], []).append(r["total_ms"])
+        st.markdown("**트리거별 소요 시간**")
+        st.table(sorted(
+            [{"트리거": t, "횟수": len(v), "평균 ms": round(sum(v) / len(v), 1), "최대 ms": max(v)}
+             for t, v in by_trigger.items()],
+            key=lambda row: row["최대 ms"], reverse=True,
+        ))
+
+
+def start_rerun(app_name: str):
+    """
+    리런 시작 시 호출. PROFILE_RERUNS 가 꺼져 있으면 비용 없는 더미 객체를 반환한다.
+    load_dotenv() 이후에 호출해야 .env 의 설정이 반영된다.
+    """
+    if not _is_enabled():
+        return _NullProfiler()
+    return RerunProfiler(app_name)
@@ -0,0 +1,259 @@
+"""
+문장 단위 합성 결과로 SRT 자막 만들기
+
+텍스트를 문장(자막 한 줄) 단위로 나눠 TTS 를 호출하고,
+돌려받은 각 조각의 재생 시간을 오디오 헤더만 읽어서 계산한다.
+(mp3 는 프레임 헤더, wav 는 RIFF 헤더 — 디코딩 없음)
+별도의 Whisper 전사 없이 자막 타이밍을 얻을 수 있다.
+
+    segments = split_segments(summary_text)
+    parts = [tts(s) for s in segments]
+    audio = concat_audio(parts, "mp3")
+    srt = build_srt(segments, [audio_duration(p, "mp3") for p in parts])
+"""
+import io
+import re
+import struct
+import wave
+
+# ---------------- 문장 분리 ----------------
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?。])\s+|(?<=다\.)\s*")
+_CLAUSE_END_RE = re.compile(r"(?<=[,，;:])\s+")
+# 목록 기호 뒤에는 공백이 있어야 함 ("2.5배", "-2%" 같은 숫자는 건드리지 않도록)
+_BULLET_RE = re.compile(r"^\s*(?:[-*•·]|\d+[.)])\s+")
+_BULLET_ONLY_RE = re.compile(r"^(?:[-*•·]|\d+[.)])$")
+
+# 자막 한 큐는 보통 한 줄 42자 × 2줄 이내
+CUE_LINE_CHARS = 42
+CUE_MAX_CHARS = CUE_LINE_CHARS * 2
+
+
+def _pack(pieces: list, max_chars: int) -> list:
+    """조각들을 공백으로 이어 붙이되 max_chars 를 넘지 않게 묶는다"""
+    out = []
+    for p in pieces:
+        if out and len(out[-1]) + 1 + len(p) <= max_chars:
+            out[-1] = f"{out[-1]} {p}"
+        else:
+            out.append(p)
+    return out
+
+
+def _split_long(sentence: str, max_chars: int) -> list:
+    """max_chars 보다 긴 문장은 쉼표 → 공백 → 글자 순으로 나눈다"""
+    if len(sentence) <= max_chars:
+        return [sentence]
+    pieces = []
+    for clause in _CLAUSE_END_RE.split(sentence):
+        if len(clause) <= max_chars:
+            pieces.append(clause)
+            continue
+        for word in _pack(clause.split(), max_chars):
+            pieces.extend(word[i:i + max_chars] for i in range(0, len(word), max_chars))
+    return _pack(pieces, max_chars)
+
+
+def split_segments(text: str, max_chars: int = CUE_MAX_CHARS) -> list:
+    """
+    자막 한 큐로 쓸 만한 길이로 나눈다. (TTS 입력으로도 그대로 사용)
+    줄마다 문장 단위로 자르고, 긴 문장은 쉼표/공백에서 나누고, 짧은 문장은 max_chars 이내로 이어 붙인다.
+    목록 기호(1. / -)는 음성에도 읽히도록 그대로 두고, 자막에서만 뺀다(caption_text).
+    """
+    segments = []
+    for line in (text or "").splitlines():
+        sentences = []
+        bullet = ""
+        for s in _SENTENCE_END_RE.split(line):
+            s = s.strip()
+            if not s:
+                continue
+            if _BULLET_ONLY_RE.match(s):
+                # "1." 처럼 기호만 떨어져 나온 경우 다음 문장 앞에 붙인다
+                bullet = f"{bullet} {s}".strip()
+                continue
+            if bullet:
+                s, bullet = f"{bullet} {s}", ""
+            sentences.extend(_split_long(s, max_chars))
+        # 목록 항목이 한 큐에 섞이지 않도록 줄 안에서만 이어 붙인다
+        segments.extend(_pack(sentences, max_chars))
+    return segments
+
+
+def caption_text(segment: str) -> str:
+    """자막 표시용 텍스트: 목록 기호를 빼고 한 줄이 길면 두 줄로 나눈다"""
+    text = _BULLET_RE.sub("", segment).strip()
+    if len(text) <= CUE_LINE_CHARS:
+        return text
+    mid = len(text) // 2
+    spaces = [i for i, c in enumerate(text) if c == " "]
+    if not spaces:
+        return f"{text[:mid]}\n{text[mid:]}"
+    cut = min(spaces, key=lambda i: abs(i - mid))
+    return f"{text[:cut]}\n{text[cut + 1:]}"
+
+
+# ---------------- mp3 길이 (프레임 헤더) ----------------
+# [version][layer] -> kbps 표 (index 0 = free, 15 = bad)
+_MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 25: [11025, 12000, 8000]}
+
+
+def _id3_size(data: bytes) -> int:
+    """앞쪽 ID3v2 태그 길이 (없으면 0)"""
+    if len(data) >= 10 and data[:3] == b"ID3":
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def _parse_mp3_header(data: bytes, pos: int):
+    """(frame_len, samples, sample_rate) 또는 유효하지 않으면 None"""
+    if pos + 4 > len(data):
+        return None
+    b1, b2 = data[pos + 1], data[pos + 2]
+    if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version_bits = (b1 >> 3) & 0x03   # 0: MPEG2.5, 2: MPEG2, 3: MPEG1
+    layer_bits = (b1 >> 1) & 0x03     # 1: Layer3, 2: Layer2, 3: Layer1
+    bitrate_idx = (b2 >> 4) & 0x0F
+    sr_idx = (b2 >> 2) & 0x03
+    padding = (b2 >> 1) & 0x01
+    if version_bits == 1 or layer_bits == 0 or bitrate_idx in (0, 15) or sr_idx == 3:
+        return None
+
+    version = {3: 1, 2: 2, 0: 25}[version_bits]
+    layer = 4 - layer_bits
+    bitrate = _MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_idx] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sr_idx]
+
+    if layer == 1:
+        samples = 384
+        frame_len = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if (layer == 2 or version == 1) else 576
+        frame_len = samples // 8 * bitrate // sample_rate + padding
+    if frame_len <= 4:
+        return None
+    return frame_len, samples, sample_rate
+
+
+def _is_info_frame(data: bytes, pos: int, frame_len: int) -> bool:
+    """Xing/Info/VBRI 메타데이터 프레임(소리 없음)인지"""
+    frame = data[pos:pos + frame_len]
+    return b"Xing" in frame[:64] or b"Info" in frame[:64] or b"VBRI" in frame[:64]
+
+
+def mp3_duration(data: bytes) -> float:
+    """프레임 헤더를 따라가며 샘플 수를 합산해 재생 시간(초) 계산"""
+    pos = _id3_size(data)
+    seconds = 0.0
+    first = True
+    while pos + 4 <= len(data):
+        header = _parse_mp3_header(data, pos)
+        if header is None:
+            pos += 1  # 동기 신호를 잃으면 다음 0xFF 를 찾아 전진
+            continue
+        frame_len, samples, sample_rate = header
+        if not (first and _is_info_frame(data, pos, frame_len)):
+            seconds += samples / sample_rate
+        first = False
+        pos += frame_len
+    return seconds
+
+
+# ---------------- wav 길이 (RIFF 헤더) ----------------
+def wav_duration(data: bytes) -> float:
+    """fmt 청크의 byte rate 와 data 청크 크기로 재생 시간(초) 계산"""
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("WAV(RIFF) 형식이 아닙니다.")
+    pos = 12
+    byte_rate = None
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        chunk_size = struct.unpack("<I", data[pos + 4:pos + 8])[0]
+        if chunk_id == b"fmt ":
+            byte_rate = struct.unpack("<I", data[pos + 16:pos + 20])[0]
+        elif chunk_id == b"data":
+            remaining = len(data) - (pos + 8)
+            # 스트리밍으로 받은 wav 는 크기 필드가 0 또는 0xFFFFFFFF 인 경우가 있음
+            if chunk_size in (0, 0xFFFFFFFF) or chunk_size > remaining:
+                chunk_size = remaining
+            if not byte_rate:
+                raise ValueError("WAV fmt 청크를 찾을 수 없습니다.")
+            return chunk_size / byte_rate
+        pos += 8 + chunk_size + (chunk_size & 1)
+    raise ValueError("WAV data 청크를 찾을 수 없습니다.")
+
+
+def audio_duration(data: bytes, fmt: str) -> float:
+    if fmt == "mp3":
+        return mp3_duration(data)
+    if fmt == "wav":
+        return wav_duration(data)
+    raise ValueError(f"길이 계산을 지원하지 않는 포맷입니다: {fmt}")
+
+
+# ---------------- 이어 붙이기 ----------------
+def _wav_frames(data: bytes):
+    with wave.open(io.BytesIO(data), "rb") as w:
+        return w.getparams(), w.readframes(w.getnframes())
+
+
+def _mp3_audio_frames(data: bytes) -> bytes:
+    """ID3 태그와 Xing/Info 프레임을 뺀 오디오 프레임만 (조각별 VBR 정보가 합친 파일과 맞지 않으므로)"""
+    pos = _id3_size(data)
+    header = _parse_mp3_header(data, pos)
+    if header is not None and _is_info_frame(data, pos, header[0]):
+        pos += header[0]
+    return data[pos:]
+
+
+def concat_audio(parts: list, fmt: str) -> bytes:
+    """
+    조각들을 하나의 파일로 합친다.
+    mp3 는 프레임 단위로 이어 붙여도 재생되므로 조각마다 태그/메타 프레임만 빼고 연결,
+    wav 는 PCM 데이터를 모아 헤더를 새로 쓴다.
+    """
+    if fmt == "mp3":
+        return b"".join(_mp3_audio_frames(p) for p in parts)
+    if fmt == "wav":
+        out = io.BytesIO()
+        params, frames = None, []
+        for p in parts:
+            p_params, p_frames = _wav_frames(p)
+            params = params or p_params
+            frames.append(p_frames)
+        with wave.open(out, "wb") as w:
+            w.setnchannels(params.nchannels)
+            w.setsampwidth(params.sampwidth)
+            w.setframerate(params.framerate)
+            w.writeframes(b"".join(frames))
+        return out.getvalue()
+    raise ValueError(f"이어 붙이기를 지원하지 않는 포맷입니다: {fmt}")
+
+
+# ---------------- SRT ----------------
+def format_srt_time(seconds: float) -> str:
+    ms = int(round(seconds * 1000))
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def build_srt(segments: list, durations: list) -> str:
+    lines = []
+    start = 0.0
+    for i, (text, dur) in enumerate(zip(segments, durations), start=1):
+        end = start + dur
+        lines += [str(i), f"{format_srt_time(start)} --> {format_srt_time(end)}", caption_text(text), ""]
+        start = end
+    return "\n".join(lines)